@@ -3,10 +3,10 @@ import sys
 import time
 
 try:
-    from PIL import ImageGrab
     import pyautogui
+    from mss import mss, tools
 except ImportError:
-    print("Install required: pip install pillow pyautogui")
+    print("Install required: pip install mss pyautogui")
     sys.exit(1)
 
 os.makedirs("assets/templates/battle", exist_ok=True)
@@ -33,6 +33,9 @@ print("2. For each template, hover your mouse over the exact element")
 print("3. Press Enter when ready")
 print("4. The script will capture after 3 seconds countdown\n")
 
+# One capture handle for all templates instead of a new DC per grab
+sct = mss()
+
 for name, description, w, h in templates:
     print(f"\n{'='*50}")
     print(f"TEMPLATE: {name}")
@@ -56,13 +59,15 @@ for name, description, w, h in templates:
     bottom = y + h//2
     
     try:
-        img = ImageGrab.grab(bbox=(left, top, right, bottom))
+        shot = sct.grab({"left": left, "top": top, "width": right - left, "height": bottom - top})
         filepath = f"assets/templates/battle/{name}.png"
-        img.save(filepath)
+        tools.to_png(shot.rgb, shot.size, output=filepath)
         print(f"✓ Saved: {filepath}")
     except Exception as e:
         print(f"✗ Failed: {e}")
 
+sct.close()
+
 print("\n" + "="*50)
 print("=== TEMPLATE CAPTURE COMPLETE ===")
 print("="*50)
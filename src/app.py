@@ -1,8 +1,6 @@
 
 import argparse, os, json, time, sys
 from .config import Config, ensure_files
-from .spots import Spots
-from .capture_loop import Bot
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 
@@ -19,6 +17,8 @@ def cmd_create_spot(name: str):
     print(f"Saved spot '{name}' at ({x},{y}).")
 
 def cmd_start():
+    # cv2/numpy/mss/win32 are only paid for when the bot actually runs
+    from .capture_loop import Bot
     bot = Bot(os.path.join(BASE_DIR, "config.json"), BASE_DIR)
     try:
         bot.start()
@@ -1,13 +1,30 @@
 # src/battle.py - Fixed Battle System with proper MSS usage
+import os
 import time
+from array import array
 import cv2
 import numpy as np
 import re
+from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, Tuple, Dict, List
-from mss import mss
+from types import MappingProxyType
+from typing import Callable, Optional, Tuple, Dict, List
 from .utils import ip_rating_meets_minimum
 
+try:
+    import pytesseract
+    HAS_TESSERACT = True
+except ImportError:
+    pytesseract = None
+    HAS_TESSERACT = False
+
+# In-process Tesseract (no subprocess per read) when tesserocr is installed
+try:
+    from tesserocr import PyTessBaseAPI, PSM
+    HAS_TESSEROCR = True
+except ImportError:
+    HAS_TESSEROCR = False
+
 # ============================================================================
 # BATTLE PHASES
 # ============================================================================
@@ -25,11 +42,23 @@ class BattlePhase(Enum):
     BATTLE_LOST = "battle_lost"
     BATTLE_END = "battle_end"
 
+class EncounterStep(Enum):
+    """Steps of Battle.handle_encounter; each step's handler returns the next one"""
+    IDENTIFY = "identify"
+    CHIP = "chip"
+    CAPTURE = "capture"
+    DEFEAT = "defeat"
+    FINISH = "finish"
+    DONE = "done"
+
 # ============================================================================
 # CONSTANTS & DATA TABLES
 # ============================================================================
 
-IP_RATINGS_ORDER = ["S+", "S", "A+", "A", "B+", "B", "C+", "C", "D+", "D", "F+", "F", "F-"]
+_DIGIT_RE = re.compile(r'(\d+)')
+_SKILL_NUM_RE = re.compile(r'(\d+)\s*$')
+_OCR_WHITELIST = "0123456789%"
+_OCR_CONFIG = f"--psm 7 -c tessedit_char_whitelist={_OCR_WHITELIST}"
 
 # Capture rate table
 CAPTURE_RATE_TABLE_100HP = {
@@ -72,27 +101,130 @@ DEFAULT_ROIS = {
     "battle_circles": {"x": 350, "y": 250, "w": 180, "h": 40},
 }
 
+# Shared by every subsystem: freeze it so nobody edits another's ROIs
+DEFAULT_ROIS = MappingProxyType({k: MappingProxyType(v) for k, v in DEFAULT_ROIS.items()})
+
+# HSV bounds for the phase color gates (built once, uint8 for cv2.inRange)
+TURN_BLUE_LO = np.array([100, 50, 50], dtype=np.uint8)
+TURN_BLUE_HI = np.array([130, 255, 255], dtype=np.uint8)
+VICTORY_GREEN_LO = np.array([40, 50, 50], dtype=np.uint8)
+VICTORY_GREEN_HI = np.array([80, 255, 255], dtype=np.uint8)
+DIALOG_ORANGE_LO = np.array([10, 100, 100], dtype=np.uint8)
+DIALOG_ORANGE_HI = np.array([30, 255, 255], dtype=np.uint8)
+
+# ROIs read by detect_battle_phase, grabbed together as one union rectangle
+PHASE_ROI_KEYS = ("victory_text", "capture_dialog", "turn_indicator", "skills_bar")
+
+# Log banners, built once
+_RULE = "═" * 50
+_BOX_TOP = "╔" + _RULE + "╗"
+_BOX_BOTTOM = "╚" + _RULE + "╝"
+
+# Back-to-back phase reads within this window reuse the last result
+PHASE_CACHE_TTL = 0.2
+
+# Colour gates only need a coverage ratio: test every Nth pixel per axis
+GATE_SAMPLE_STEP = 2
+
+# HSV bounds for the enemy HP bar fill: red (H 0-10), yellow (20-40) and
+# green (40-80) share S,V >= 50, so the bar is the 0-80 span minus the 11-19 gap
+HP_BAR_LO = np.array([0, 50, 50], dtype=np.uint8)
+HP_BAR_HI = np.array([80, 255, 255], dtype=np.uint8)
+HP_GAP_LO = np.array([11, 50, 50], dtype=np.uint8)
+HP_GAP_HI = np.array([19, 255, 255], dtype=np.uint8)
+
+ALL_RARITIES = ("Common", "Rare", "Epic", "Exotic", "Legendary")
+_RATING_IDX = {rating: i for i, rating in enumerate(CAPTURE_RATE_TABLE_100HP)}
+_RARITY_IDX = {rarity: i for i, rarity in enumerate(ALL_RARITIES)}
+
+def _build_rate_lookup() -> Dict[str, Dict[int, Tuple[str, int]]]:
+    """Per rarity: capture rate -> (closest IP rating, diff), kept only when diff <= 3"""
+    lookup = {}
+    for rarity in ALL_RARITIES:
+        rates = [rarity_rates[rarity] for rarity_rates in CAPTURE_RATE_TABLE_100HP.values()]
+        by_rate = {}
+        for rate in range(min(rates) - 3, max(rates) + 4):
+            best_rating, best_diff = None, 999
+            for rating, rarity_rates in CAPTURE_RATE_TABLE_100HP.items():
+                diff = abs(rarity_rates[rarity] - rate)
+                if diff < best_diff:
+                    best_rating, best_diff = rating, diff
+            if best_diff <= 3:
+                by_rate[rate] = (best_rating, best_diff)
+        lookup[rarity] = by_rate
+    return lookup
+
+_RATE_LOOKUP = _build_rate_lookup()
+
 def estimate_ip_rating_from_capture_rate(capture_rate: int, possible_rarities=None) -> Tuple[Optional[str], Optional[str]]:
     """Estimate IP rating and rarity from capture rate at 100% HP"""
     if possible_rarities is None:
-        possible_rarities = ["Common", "Rare", "Epic", "Exotic", "Legendary"]
+        possible_rarities = ALL_RARITIES
     
     best_match = None
-    best_diff = 999
+    best_key = None
     
-    for rating, rarity_rates in CAPTURE_RATE_TABLE_100HP.items():
-        for rarity, expected_rate in rarity_rates.items():
-            if rarity not in possible_rarities:
-                continue
-            diff = abs(expected_rate - capture_rate)
-            if diff < best_diff:
-                best_diff = diff
-                best_match = (rating, rarity)
+    for rarity in possible_rarities:
+        hit = _RATE_LOOKUP.get(rarity, {}).get(capture_rate)
+        if hit is None:
+            continue
+        rating, diff = hit
+        # Same tie-break as a full table scan: lowest diff, then rating order, then rarity order
+        key = (diff, _RATING_IDX[rating], _RARITY_IDX[rarity])
+        if best_key is None or key < best_key:
+            best_key = key
+            best_match = (rating, rarity)
     
-    if best_match and best_diff <= 3:
+    if best_match:
         return best_match
     return (None, None)
 
+def _trim_glyph(mask: np.ndarray) -> Optional[np.ndarray]:
+    """Crop a boolean glyph mask to the bounding box of its set pixels"""
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0:
+        return None
+    return np.ascontiguousarray(mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1])
+
+def _rect(roi) -> Tuple[int, int, int, int]:
+    """ROI dict -> (x, y, w, h), ready to splat into screen_grab_region"""
+    return roi["x"], roi["y"], roi["w"], roi["h"]
+
+def _union_box(rois) -> Tuple[int, int, int, int]:
+    """Bounding box (x, y, w, h) covering all given ROI dicts"""
+    x0 = min(r["x"] for r in rois)
+    y0 = min(r["y"] for r in rois)
+    x1 = max(r["x"] + r["w"] for r in rois)
+    y1 = max(r["y"] + r["h"] for r in rois)
+    return x0, y0, x1 - x0, y1 - y0
+
+def _sample_for_gate(frame_bgr: np.ndarray) -> np.ndarray:
+    """
+    Nearest-neighbour subsample for the colour-ratio gates.
+    Pixels keep their exact colours (no blending across the banner edge),
+    so the ratio is an unbiased estimate at 1/STEP^2 of the work.
+    """
+    h, w = frame_bgr.shape[:2]
+    size = (max(1, w // GATE_SAMPLE_STEP), max(1, h // GATE_SAMPLE_STEP))
+    return cv2.resize(frame_bgr, size, interpolation=cv2.INTER_NEAREST)
+
+def _green_max_ratio(frame_bgr: np.ndarray) -> float:
+    """
+    Fraction of pixels whose G channel is the max and >= 50 (BGR only, no HSV).
+    OpenCV hue 40-80 only comes from the V == G branch, and V >= 50 means
+    G >= 50, so this is an upper bound on the VICTORY_GREEN mask ratio.
+    """
+    b, g, r = cv2.split(frame_bgr)
+    dominant = cv2.compare(g, cv2.max(b, r), cv2.CMP_GE)
+    bright = cv2.compare(g, int(VICTORY_GREEN_LO[2]), cv2.CMP_GE)
+    return cv2.countNonZero(cv2.bitwise_and(dominant, bright)) / dominant.size
+
+def _parse_skill(skill_str, default: int) -> int:
+    """'Skill 11' -> 11; falls back to default on anything unparsable"""
+    m = _SKILL_NUM_RE.search(skill_str) if isinstance(skill_str, str) else None
+    return int(m.group(1)) if m else default
+
 # ============================================================================
 # PHASE TRACKER
 # ============================================================================
@@ -100,24 +232,32 @@ def estimate_ip_rating_from_capture_rate(capture_rate: int, possible_rarities=No
 class PhaseTracker:
     """Tracks current battle phase and transitions"""
     
+    __slots__ = ("log", "current_phase", "phase_start_time", "_phases", "_durations")
+    
     def __init__(self, log):
         self.log = log
         self.current_phase = BattlePhase.NOT_IN_BATTLE
         self.phase_start_time = time.time()
-        self.phase_history = []
+        # Parallel arrays: phase left, and seconds spent in it
+        self._phases: List[BattlePhase] = []
+        self._durations = array('f')
         
+    @property
+    def phase_history(self) -> List[Dict]:
+        """Past phases as [{"phase", "duration"}], built on demand"""
+        return [{"phase": p, "duration": d} for p, d in zip(self._phases, self._durations)]
+    
     def transition_to(self, new_phase: BattlePhase):
         """Transition to a new phase"""
         if self.current_phase == new_phase:
             return
         
         duration = time.time() - self.phase_start_time
-        self.phase_history.append({
-            "phase": self.current_phase,
-            "duration": duration
-        })
+        self._phases.append(self.current_phase)
+        self._durations.append(duration)
         
-        self.log.debug(f"Phase: {self.current_phase.value} → {new_phase.value} ({duration:.1f}s)")
+        # Lazy %-args: nothing is formatted unless debug logging is on
+        self.log.debug("Phase: %s → %s (%.1fs)", self.current_phase.value, new_phase.value, duration)
         self.current_phase = new_phase
         self.phase_start_time = time.time()
     
@@ -133,7 +273,8 @@ class PhaseTracker:
         """Reset phase tracker"""
         self.current_phase = BattlePhase.NOT_IN_BATTLE
         self.phase_start_time = time.time()
-        self.phase_history = []
+        self._phases.clear()
+        del self._durations[:]
 
 # ============================================================================
 # BATTLE DETECTOR
@@ -148,37 +289,73 @@ class BattleDetector:
         self.log = log
         self.base_dir = base_dir
         self.rois = DEFAULT_ROIS
+        self.templates: Dict[str, Dict] = {}
         self.flee_template = None
         self.continue_template = None
         self._load_templates()
+        self._phase_box = _union_box([self.rois[k] for k in PHASE_ROI_KEYS])
+        # Each gate ROI as (row, col) slices into the phase frame
+        bx, by = self._phase_box[0], self._phase_box[1]
+        self._phase_slices = {}
+        for k in PHASE_ROI_KEYS:
+            x, y, w, h = _rect(self.rois[k])
+            self._phase_slices[k] = (slice(y - by, y - by + h), slice(x - bx, x - bx + w))
+        self._phase_cache: Tuple[Optional[BattlePhase], float] = (None, 0.0)  # (phase, read_at)
     
     def _load_templates(self):
-        import os
-        flee_path = os.path.join(self.base_dir, "assets", "templates", "battle", "flee_button.png")
-        if os.path.exists(flee_path):
-            self.flee_template = cv2.imread(flee_path, cv2.IMREAD_COLOR)
+        """Decode battle templates once into contiguous BGR + grayscale copies"""
+        tpl_dir = os.path.join(self.base_dir, "assets", "templates", "battle")
+        for name in ("flee_button", "continue_button"):
+            img = cv2.imread(os.path.join(tpl_dir, f"{name}.png"), cv2.IMREAD_COLOR)
+            if img is None:
+                continue  # missing/unreadable: skip at load time, not per frame
+            img = np.ascontiguousarray(img)
+            self.templates[name] = {
+                "bgr": img,
+                "gray": cv2.cvtColor(img, cv2.COLOR_BGR2GRAY),
+                "h": img.shape[0],
+                "w": img.shape[1],
+            }
+        
+        self.flee_template = self.templates.get("flee_button", {}).get("bgr")
+        self.continue_template = self.templates.get("continue_button", {}).get("bgr")
+    
+    def invalidate_phase_cache(self):
+        """Drop the cached phase (call after input that changes the screen)"""
+        self._phase_cache = (None, 0.0)
+    
+    def detect_battle_phase(self, max_age: float = PHASE_CACHE_TTL) -> BattlePhase:
+        """Detect current battle phase from screen; reuses a result younger than max_age"""
+        phase, read_at = self._phase_cache
+        if phase is not None and time.time() - read_at < max_age:
+            return phase
         
-        continue_path = os.path.join(self.base_dir, "assets", "templates", "battle", "continue_button.png")
-        if os.path.exists(continue_path):
-            self.continue_template = cv2.imread(continue_path, cv2.IMREAD_COLOR)
+        phase = self._read_battle_phase()
+        self._phase_cache = (phase, time.time())
+        return phase
     
-    def detect_battle_phase(self) -> BattlePhase:
-        """Detect current battle phase from screen"""
+    def _read_battle_phase(self) -> BattlePhase:
+        """Classify the current phase from one grab of the phase ROIs"""
         try:
+            # One grab for all gate ROIs; each gate slices its own view
+            phase_frame = self._capture_phase_frame()
+            if phase_frame is None:
+                return BattlePhase.NOT_IN_BATTLE
+            
             # Check for victory screen
-            if self._detect_victory_screen():
+            if self._detect_victory_screen(phase_frame):
                 return BattlePhase.BATTLE_WON
             
             # Check for capture dialog
-            if self._detect_capture_dialog():
+            if self._detect_capture_dialog(phase_frame):
                 return BattlePhase.CAPTURE_SUCCESS
             
             # Check for turn indicator
-            if self._detect_turn_ready():
+            if self._detect_turn_ready(phase_frame):
                 return BattlePhase.TURN_READY
             
             # Check for battle indicators
-            if self._detect_battle_ui():
+            if self._detect_battle_ui(phase_frame):
                 return BattlePhase.TURN_WAITING
             
             return BattlePhase.NOT_IN_BATTLE
@@ -187,84 +364,90 @@ class BattleDetector:
             return BattlePhase.NOT_IN_BATTLE
     
     def _capture_roi(self, roi_key: str) -> Optional[np.ndarray]:
-        """Capture a specific ROI region"""
+        """Capture a specific ROI region (BGR) through the shared Vision grabber"""
         try:
             roi = self.rois[roi_key]
-            with mss() as sct:
-                monitor = {
-                    "left": roi["x"],
-                    "top": roi["y"], 
-                    "width": roi["w"],
-                    "height": roi["h"]
-                }
-                grab = sct.grab(monitor)
-                frame = np.array(grab)[:, :, :3]  # Drop alpha channel
-                return frame
+            return self.vision.screen_grab_region(roi["x"], roi["y"], roi["w"], roi["h"])
         except Exception as e:
             self.log.debug(f"ROI capture error ({roi_key}): {e}")
             return None
     
-    def _detect_battle_ui(self) -> bool:
+    def _capture_phase_frame(self) -> Optional[np.ndarray]:
+        """Capture the union of the phase-gate ROIs in a single grab"""
+        try:
+            x, y, w, h = self._phase_box
+            return self.vision.screen_grab_region(x, y, w, h)
+        except Exception as e:
+            self.log.debug(f"Phase frame capture error: {e}")
+            return None
+    
+    def _get_roi(self, roi_key: str, phase_frame: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """View of an ROI inside a pre-grabbed phase frame, or a fresh capture without one"""
+        if phase_frame is None:
+            return self._capture_roi(roi_key)
+        rows, cols = self._phase_slices[roi_key]
+        return phase_frame[rows, cols]
+    
+    def _detect_battle_ui(self, phase_frame: Optional[np.ndarray] = None) -> bool:
         """Detect if battle UI is present"""
-        frame = self._capture_roi("skills_bar")
+        frame = self._get_roi("skills_bar", phase_frame)
         if frame is None or frame.size == 0:
             return False
         
         # Check for skill bar colors/edges
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         edges = cv2.Canny(gray, 50, 150)
-        edge_ratio = np.count_nonzero(edges) / edges.size
+        edge_ratio = cv2.countNonZero(edges) / edges.size
         
         return edge_ratio > 0.05
     
-    def _detect_turn_ready(self) -> bool:
+    def _detect_turn_ready(self, phase_frame: Optional[np.ndarray] = None) -> bool:
         """Detect 'It's your turn!' indicator"""
-        frame = self._capture_roi("turn_indicator")
+        frame = self._get_roi("turn_indicator", phase_frame)
         if frame is None or frame.size == 0:
             return False
+        frame = _sample_for_gate(frame)
         
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        hsv = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2HSV)
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
         
         # Blue banner detection
-        blue_lower = np.array([100, 50, 50])
-        blue_upper = np.array([130, 255, 255])
-        blue_mask = cv2.inRange(hsv, blue_lower, blue_upper)
-        blue_ratio = np.count_nonzero(blue_mask) / blue_mask.size
+        blue_mask = cv2.inRange(hsv, TURN_BLUE_LO, TURN_BLUE_HI)
+        blue_ratio = cv2.countNonZero(blue_mask) / blue_mask.size
         
         return blue_ratio > 0.15
     
-    def _detect_victory_screen(self) -> bool:
+    def _detect_victory_screen(self, phase_frame: Optional[np.ndarray] = None) -> bool:
         """Detect 'You Win!' victory screen"""
-        frame = self._capture_roi("victory_text")
+        frame = self._get_roi("victory_text", phase_frame)
         if frame is None or frame.size == 0:
             return False
+        frame = _sample_for_gate(frame)
         
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        hsv = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2HSV)
+        # Cheap BGR bound first: if even the green-dominant pixels stay under
+        # the banner ratio, the HSV gate below can't pass either
+        if _green_max_ratio(frame) <= 0.1:
+            return False
+        
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
         
         # Green victory banner
-        green_lower = np.array([40, 50, 50])
-        green_upper = np.array([80, 255, 255])
-        green_mask = cv2.inRange(hsv, green_lower, green_upper)
-        green_ratio = np.count_nonzero(green_mask) / green_mask.size
+        green_mask = cv2.inRange(hsv, VICTORY_GREEN_LO, VICTORY_GREEN_HI)
+        green_ratio = cv2.countNonZero(green_mask) / green_mask.size
         
         return green_ratio > 0.1
     
-    def _detect_capture_dialog(self) -> bool:
+    def _detect_capture_dialog(self, phase_frame: Optional[np.ndarray] = None) -> bool:
         """Detect capture success dialog"""
-        frame = self._capture_roi("capture_dialog")
+        frame = self._get_roi("capture_dialog", phase_frame)
         if frame is None or frame.size == 0:
             return False
+        frame = _sample_for_gate(frame)
         
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        hsv = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2HSV)
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
         
         # Orange/yellow dialog detection
-        orange_lower = np.array([10, 100, 100])
-        orange_upper = np.array([30, 255, 255])
-        orange_mask = cv2.inRange(hsv, orange_lower, orange_upper)
-        orange_ratio = np.count_nonzero(orange_mask) / orange_mask.size
+        orange_mask = cv2.inRange(hsv, DIALOG_ORANGE_LO, DIALOG_ORANGE_HI)
+        orange_ratio = cv2.countNonZero(orange_mask) / orange_mask.size
         
         return orange_ratio > 0.15
 
@@ -281,12 +464,17 @@ class SkillManager:
         self.log = log
         self.rois = DEFAULT_ROIS
         self.current_page = 1
-        self.visible_skills = [1, 2, 3, 4]
+        self._slot_xy = tuple((self.rois[f"skill_slot_{i}"]["x"], self.rois[f"skill_slot_{i}"]["y"]) for i in range(1, 5))
+    
+    @property
+    def visible_skills(self) -> range:
+        """Skills shown on the current page (derived from the page number)"""
+        start_skill = ((self.current_page - 1) * 4) + 1
+        return range(start_skill, start_skill + 4)
     
     def reset_to_page_1(self):
         """Reset to page 1 (strongest skills)"""
         self.current_page = 1
-        self.visible_skills = [1, 2, 3, 4]
     
     def get_page_for_skill(self, skill_num: int) -> int:
         """Get which page a skill is on (1-3)"""
@@ -304,35 +492,22 @@ class SkillManager:
             return True
         
         # Navigate
-        if target_page > self.current_page:
-            for _ in range(target_page - self.current_page):
-                self.io.key("right")
-                time.sleep(0.3)
-        else:
-            for _ in range(self.current_page - target_page):
-                self.io.key("left")
-                time.sleep(0.3)
+        delta = target_page - self.current_page
+        key = "right" if delta > 0 else "left"
+        for _ in range(abs(delta)):
+            self.io.key(key)
+            time.sleep(0.3)
         
         self.current_page = target_page
-        self._update_visible_skills()
         return True
     
-    def _update_visible_skills(self):
-        """Update list of currently visible skills"""
-        start_skill = ((self.current_page - 1) * 4) + 1
-        self.visible_skills = [start_skill + i for i in range(4)]
-    
     def use_skill(self, skill_num: int) -> bool:
         """Use a skill by number (1-12)"""
         if not self.navigate_to_skill(skill_num):
             return False
         
-        position = ((skill_num - 1) % 4) + 1
-        slot_key = f"skill_slot_{position}"
-        roi = self.rois[slot_key]
-        
         self.log.info(f"⚔️ Using Skill {skill_num}")
-        self.io.click_xy(roi["x"], roi["y"])
+        self.io.click_xy(*self._slot_xy[(skill_num - 1) % 4])
         time.sleep(0.5)
         
         return True
@@ -349,39 +524,34 @@ class HPMonitor:
         self.vision = vision
         self.log = log
         self.rois = DEFAULT_ROIS
+        self._hp_rect = _rect(self.rois["enemy_hp_bar"])
     
     def get_hp_percent(self) -> Optional[float]:
         """Read enemy HP percentage from HP bar"""
         try:
-            roi = self.rois["enemy_hp_bar"]
-            frame = self.vision.screen_grab_region(roi["x"], roi["y"], roi["w"], roi["h"])
+            frame = self.vision.screen_grab_region(*self._hp_rect)
             
             if frame.size == 0:
                 return None
             
-            hsv = cv2.cvtColor(frame, cv2.COLOR_RGB2HSV)
-            
-            # Detect HP bar colors
-            green_mask = cv2.inRange(hsv, np.array([40, 50, 50]), np.array([80, 255, 255]))
-            yellow_mask = cv2.inRange(hsv, np.array([20, 50, 50]), np.array([40, 255, 255]))
-            red_mask = cv2.inRange(hsv, np.array([0, 50, 50]), np.array([10, 255, 255]))
+            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
             
-            hp_mask = green_mask | yellow_mask | red_mask
+            # Detect HP bar colors: one inRange over the red..green span,
+            # then clear the orange gap between red and yellow
+            hp_mask = cv2.inRange(hsv, HP_BAR_LO, HP_BAR_HI)
+            gap_mask = cv2.inRange(hsv, HP_GAP_LO, HP_GAP_HI)
+            cv2.subtract(hp_mask, gap_mask, dst=hp_mask)
             
-            if hp_mask.sum() == 0:
+            # Calculate fill percentage: mean of each non-empty row's rightmost pixel
+            filled_rows = hp_mask.any(axis=1)
+            if not filled_rows.any():
                 return 0.0
             
-            # Calculate fill percentage
-            filled_cols = []
-            for row in range(hp_mask.shape[0]):
-                row_pixels = np.where(hp_mask[row] > 0)[0]
-                if len(row_pixels) > 0:
-                    filled_cols.append(row_pixels[-1])
-            
-            if not filled_cols:
-                return 0.0
+            # argmax on the mirrored rows finds the last set pixel per row
+            width = hp_mask.shape[1]
+            rightmost = (width - 1) - hp_mask[filled_rows, ::-1].argmax(axis=1)
             
-            avg_rightmost = np.mean(filled_cols)
+            avg_rightmost = rightmost.mean()
             percent = (avg_rightmost / frame.shape[1]) * 100
             
             return min(100.0, max(0.0, percent))
@@ -396,54 +566,160 @@ class HPMonitor:
 class CaptureRateDetector:
     """Detect capture rate and derive Miscrit info"""
     
-    def __init__(self, cfg, vision, log):
+    def __init__(self, cfg, vision, log, base_dir=None):
         self.cfg = cfg
         self.vision = vision
         self.log = log
+        self.base_dir = base_dir
         self.rois = DEFAULT_ROIS
+        self._rate_rect = _rect(self.rois["capture_rate"])
+        self._digit_tpls: Dict[str, np.ndarray] = {}
+        self._load_digit_templates()
+        self._ocr_cache: Dict[bytes, Optional[int]] = {}
+        self._ocr_cache_cap = 64
         
-        try:
-            import pytesseract
-            self.has_ocr = True
-        except ImportError:
-            self.has_ocr = False
+        self._pt = pytesseract
+        self._tess_api = None
+        if HAS_TESSEROCR:
+            try:
+                self._tess_api = PyTessBaseAPI(psm=PSM.SINGLE_LINE)
+                self._tess_api.SetVariable("tessedit_char_whitelist", _OCR_WHITELIST)
+            except RuntimeError:
+                self._tess_api = None  # tessdata not found: use pytesseract
+        self.has_ocr = HAS_TESSERACT or self._tess_api is not None
+        if not self.has_ocr and not self._digit_tpls:
             self.log.warning("Tesseract not available - capture rate detection limited")
     
+    def _load_digit_templates(self):
+        """
+        Load optional digit glyphs from assets/templates/digits (0.png-9.png, percent.png).
+        Crops of the capture-rate text at ROI scale; stored binarised and trimmed
+        like the thresholded ROI so a glyph compares directly against a digit box.
+        """
+        if not self.base_dir:
+            return
+        tpl_dir = os.path.join(self.base_dir, "assets", "templates", "digits")
+        if not os.path.isdir(tpl_dir):
+            return
+        
+        for label in [str(d) for d in range(10)] + ["percent"]:
+            img = cv2.imread(os.path.join(tpl_dir, f"{label}.png"), cv2.IMREAD_GRAYSCALE)
+            if img is None:
+                continue
+            _, th = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            if th[0, 0] < 128:
+                th = cv2.bitwise_not(th)
+            glyph = _trim_glyph(th < 128)
+            if glyph is not None:
+                self._digit_tpls["%" if label == "percent" else label] = glyph
+        
+        # All ten digits are needed to read arbitrary rates
+        if sum(1 for k in self._digit_tpls if k.isdigit()) < 10:
+            self._digit_tpls = {}
+        else:
+            self.log.info("Capture rate: using digit templates")
+    
+    def _read_digits(self, thresh: np.ndarray) -> Optional[int]:
+        """Read the rate by segmenting glyphs into connected components and matching each against the digit templates"""
+        fg = thresh < 128
+        n, labels, stats, _ = cv2.connectedComponentsWithStats(fg.view(np.uint8), connectivity=8)
+        if n <= 1:
+            return None
+        
+        # Left to right; components overlapping in x are parts of one glyph (the "%" rings)
+        groups = []
+        for i in sorted(range(1, n), key=lambda i: stats[i, cv2.CC_STAT_LEFT]):
+            if stats[i, cv2.CC_STAT_AREA] < 3:
+                continue  # threshold speckle
+            x0 = stats[i, cv2.CC_STAT_LEFT]
+            x1 = x0 + stats[i, cv2.CC_STAT_WIDTH]
+            if groups and x0 < groups[-1][1]:
+                groups[-1][1] = max(groups[-1][1], x1)
+                groups[-1][2].append(i)
+            else:
+                groups.append([x0, x1, [i]])
+        
+        digits = ""
+        for x0, x1, ids in groups:
+            # Only this glyph's own pixels, even if a kerned neighbour shares columns
+            glyph = _trim_glyph(np.isin(labels[:, x0:x1], ids))
+            if glyph is None:
+                continue
+            
+            best_label, best_score = None, 0.0
+            for label, tpl in self._digit_tpls.items():
+                box = cv2.resize(glyph.view(np.uint8), (tpl.shape[1], tpl.shape[0]),
+                                 interpolation=cv2.INTER_NEAREST).view(bool)
+                score = np.count_nonzero(box == tpl) / tpl.size
+                if score > best_score:
+                    best_label, best_score = label, score
+            
+            if best_label == "%" or (best_score < 0.8 and digits):
+                break  # percent sign (or unknown trailing glyph) ends the number
+            if best_score < 0.8:
+                return None
+            digits += best_label
+        
+        if not digits or len(digits) > 3:
+            return None
+        rate = int(digits)
+        return rate if 0 <= rate <= 100 else None
+    
     def detect_capture_rate(self) -> Optional[int]:
         """Read capture rate percentage"""
         try:
-            roi = self.rois["capture_rate"]
-            frame = self.vision.screen_grab_region(roi["x"], roi["y"], roi["w"], roi["h"])
+            gray = self.vision.screen_grab_region(*self._rate_rect, grayscale=True)
             
-            if frame.size == 0:
+            if gray.size == 0:
                 return None
             
-            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
             _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
             
             if thresh[0, 0] < 128:
                 thresh = cv2.bitwise_not(thresh)
             
-            thresh = cv2.resize(thresh, (0, 0), fx=2, fy=2)
+            # The rate text is static between polls: identical pixels, identical answer
+            key = thresh.tobytes()
+            if key in self._ocr_cache:
+                return self._ocr_cache[key]
             
-            if self.has_ocr:
-                import pytesseract
-                text = pytesseract.image_to_string(
-                    thresh,
-                    config='--psm 7 -c tessedit_char_whitelist=0123456789%'
-                ).strip()
-                
-                match = re.search(r'(\d+)', text)
-                if match:
-                    rate = int(match.group(1))
-                    if 0 <= rate <= 100:
-                        return rate
-            
-            return None
+            rate = self._read_rate(thresh)
+            self._ocr_cache[key] = rate
+            if len(self._ocr_cache) > self._ocr_cache_cap:
+                self._ocr_cache.pop(next(iter(self._ocr_cache)))  # FIFO eviction
+            return rate
         except Exception as e:
             self.log.error(f"Capture rate detection error: {e}")
             return None
     
+    def _read_rate(self, thresh: np.ndarray) -> Optional[int]:
+        """Read the rate from the thresholded ROI (digit templates, then tesseract)"""
+        # Digit templates: no tesseract subprocess; OCR below stays the fallback
+        if self._digit_tpls:
+            rate = self._read_digits(thresh)
+            if rate is not None:
+                return rate
+        
+        thresh = cv2.resize(thresh, (0, 0), fx=2, fy=2)
+        
+        if self.has_ocr:
+            if self._tess_api is not None:
+                # Persistent API: init state is kept, only the image changes
+                thresh = np.ascontiguousarray(thresh)
+                h, w = thresh.shape[:2]
+                self._tess_api.SetImageBytes(thresh.tobytes(), w, h, 1, w)
+                text = self._tess_api.GetUTF8Text().strip()
+            else:
+                text = self._pt.image_to_string(thresh, config=_OCR_CONFIG).strip()
+            
+            match = _DIGIT_RE.search(text)
+            if match:
+                rate = int(match.group(1))
+                if 0 <= rate <= 100:
+                    return rate
+        
+        return None
+    
     def get_miscrit_info(self) -> Tuple[Optional[int], Optional[str], Optional[str]]:
         """Detect capture rate and derive IP rating + rarity"""
         capture_rate = self.detect_capture_rate()
@@ -459,6 +735,32 @@ class CaptureRateDetector:
         
         return (capture_rate, None, None)
 
+# ============================================================================
+# BATTLE CONFIG
+# ============================================================================
+
+@dataclass(frozen=True, slots=True)
+class BattleConfig:
+    """Snapshot of cfg["battle"], read once instead of per encounter"""
+    mode: str = "capture"
+    capture_hp_percent: float = 10.0
+    attempts: int = 3
+    use_capture_skill_before: bool = False
+    defeat_skill: int = 1
+    max_turns_per_battle: int = 25
+    
+    @classmethod
+    def from_cfg(cls, cfg: Dict) -> "BattleConfig":
+        bcfg = cfg.get("battle", {})
+        return cls(
+            mode=bcfg.get("mode", "capture"),
+            capture_hp_percent=float(bcfg.get("capture_hp_percent", 10)),
+            attempts=int(bcfg.get("attempts", 3)),
+            use_capture_skill_before=bool(bcfg.get("use_capture_skill_before", False)),
+            defeat_skill=_parse_skill(bcfg.get("defeat_skill", "Skill 1"), 1),
+            max_turns_per_battle=int(bcfg.get("max_turns_per_battle", 25)),
+        )
+
 # ============================================================================
 # BATTLE CONTROLLER
 # ============================================================================
@@ -466,6 +768,15 @@ class CaptureRateDetector:
 class Battle:
     """Enhanced battle controller"""
     
+    # Lives for the whole session; fixed attribute set, no per-instance __dict__
+    __slots__ = (
+        "cfg", "vision", "io", "log", "base_dir",
+        "detector", "skill_mgr", "hp_monitor", "capture_detector", "phase_tracker",
+        "rois", "_keep_xy", "_continue_xy",
+        "_battle_cfg", "_skill_cache", "_plan_strings", "_turns_left", "_target_rarity", "_step_handlers",
+        "stats",
+    )
+    
     def __init__(self, cfg, vision, input_ctl, log, base_dir):
         self.cfg = cfg
         self.vision = vision
@@ -477,14 +788,30 @@ class Battle:
         self.detector = BattleDetector(cfg, vision, log, base_dir)
         self.skill_mgr = SkillManager(cfg, input_ctl, log)
         self.hp_monitor = HPMonitor(cfg, vision, log)
-        self.capture_detector = CaptureRateDetector(cfg, vision, log)
+        self.capture_detector = CaptureRateDetector(cfg, vision, log, base_dir)
         self.phase_tracker = PhaseTracker(log)
         
         # Store reference to rois
         self.rois = self.detector.rois
+        self._keep_xy = (self.rois["keep_button"]["x"], self.rois["keep_button"]["y"])
+        self._continue_xy = (self.rois["continue_button"]["x"], self.rois["continue_button"]["y"])
         
         # Battle configuration
-        self.battle_mode = cfg.get("battle", {}).get("mode", "capture")
+        self._battle_cfg = BattleConfig()
+        self._skill_cache: Dict[str, Dict[str, int]] = {}
+        self._plan_strings: Dict[str, str] = {}
+        self._turns_left = 0
+        self._target_rarity: Optional[str] = None
+        self.reload_config()
+        
+        # Encounter state machine: step -> handler returning the next step
+        self._step_handlers: Dict[EncounterStep, Callable[[], EncounterStep]] = {
+            EncounterStep.IDENTIFY: self._step_identify,
+            EncounterStep.CHIP: self._step_chip,
+            EncounterStep.CAPTURE: self._step_capture,
+            EncounterStep.DEFEAT: self._step_defeat,
+            EncounterStep.FINISH: self._step_finish,
+        }
         
         # Statistics
         self.stats = {
@@ -495,6 +822,42 @@ class Battle:
             "defeated": 0
         }
     
+    def reload_config(self, cfg=None):
+        """Snapshot battle settings and skill numbers; call again after the config changes"""
+        if cfg is not None:
+            self.cfg = cfg
+        
+        self._battle_cfg = BattleConfig.from_cfg(self.cfg)
+        
+        per_rarity = self.cfg.get("eligibility", {}).get("per_rarity", {})
+        self._skill_cache = {
+            rarity: {
+                "damage_skill": _parse_skill(rarity_cfg.get("damage_skill", "Skill 11"), 11),
+                "capture_skill": _parse_skill(rarity_cfg.get("capture_skill", "Skill 12"), 12),
+            }
+            for rarity, rarity_cfg in per_rarity.items()
+        }
+        
+        # Capture plan log line per rarity, formatted here instead of per encounter
+        bc = self._battle_cfg
+        self._plan_strings = {}
+        for rarity in ALL_RARITIES:
+            skills = self._skills_for(rarity)
+            pre_throw = f", each after Skill {skills['capture_skill']}" if bc.use_capture_skill_before else ""
+            self._plan_strings[rarity] = (
+                "🎯 TARGET DETECTED - Capture mode\n"
+                f"   Plan: Skill {skills['damage_skill']} down to {bc.capture_hp_percent:g}% HP, "
+                f"then up to {bc.attempts} throws{pre_throw}"
+            )
+    
+    @property
+    def battle_mode(self) -> str:
+        return self._battle_cfg.mode
+    
+    def _skills_for(self, rarity: str) -> Dict[str, int]:
+        """Cached damage/capture skill numbers for a rarity"""
+        return self._skill_cache.get(rarity) or {"damage_skill": 11, "capture_skill": 12}
+    
     def is_eligible(self, rarity: str, ip_rating: str) -> bool:
         """Check if Miscrit meets capture criteria"""
         if self.battle_mode == "defeat":
@@ -514,16 +877,20 @@ class Battle:
         if not ip_rating:
             return False
         
-        if min_ip == "B+ and Below":
-            if ip_rating not in ["B+", "B", "C+", "C", "D+", "D", "F+", "F", "F-"]:
-                return False
-        else:
-            if not ip_rating_meets_minimum(ip_rating, min_ip):
-                return False
+        # Dict rank lookups / frozenset membership in utils; no list scans
+        if not ip_rating_meets_minimum(ip_rating, min_ip):
+            return False
         
         self.log.info(f"✅ ELIGIBLE: {rarity} {ip_rating}")
         return True
     
+    def _spend_turn(self) -> bool:
+        """Take one turn from the chip/capture budget; False once it is used up"""
+        if self._turns_left <= 0:
+            return False
+        self._turns_left -= 1
+        return True
+    
     def wait_for_turn(self, timeout: float = 8.0) -> bool:
         """Wait for turn to be ready"""
         start_time = time.time()
@@ -539,17 +906,40 @@ class Battle:
         
         return False
     
+    def _wait_until(self, predicate, initial: float = 0.25, cap: float = 2.0, timeout: float = 8.0) -> bool:
+        """Poll predicate() with a growing delay (x1.6 up to cap) until it holds or timeout"""
+        deadline = time.time() + timeout
+        delay = initial
+        while True:
+            time.sleep(min(delay, max(0.0, deadline - time.time())))
+            if predicate():
+                return True
+            if time.time() >= deadline:
+                return False
+            delay = min(delay * 1.6, cap)
+    
+    def _wait_for_skill_to_resolve(self, max_wait: float):
+        """After a skill click: wait for the animation, returning early once the turn is back or the battle ended"""
+        # The skill click changed the screen; don't serve the pre-click phase
+        self.detector.invalidate_phase_cache()
+        detect = self.detector.detect_battle_phase
+        start = time.time()
+        # The turn banner lingers for a moment after the click; let it clear first
+        self._wait_until(lambda: detect() != BattlePhase.TURN_READY, initial=0.2, cap=0.5, timeout=min(1.5, max_wait))
+        # Both waits share max_wait, so the old flat sleep stays the upper bound
+        remaining = max_wait - (time.time() - start)
+        if remaining <= 0:
+            return
+        self._wait_until(
+            lambda: detect() in (BattlePhase.TURN_READY, BattlePhase.BATTLE_WON, BattlePhase.CAPTURE_SUCCESS),
+            initial=0.3, cap=1.0, timeout=remaining,
+        )
+    
     def chip_hp_to_threshold(self, rarity: str, target_hp: float) -> bool:
         """Reduce enemy HP to target threshold"""
         max_attempts = 15
         
-        rarity_cfg = self.cfg.get("eligibility", {}).get("per_rarity", {}).get(rarity, {})
-        damage_skill_str = rarity_cfg.get("damage_skill", "Skill 11")
-        
-        try:
-            damage_skill = int(damage_skill_str.split()[-1])
-        except:
-            damage_skill = 11
+        damage_skill = self._skills_for(rarity)["damage_skill"]
         
         self.log.info(f"💥 Reducing HP to {target_hp:.1f}%")
         
@@ -560,31 +950,34 @@ class Battle:
                 self.log.info(f"✓ Target HP reached: {hp:.1f}%")
                 return True
             
+            if not self._spend_turn():
+                self.log.warning("Turn budget used up while chipping HP")
+                return False
+            
             self.wait_for_turn(5.0)
             self.skill_mgr.use_skill(damage_skill)
             self.phase_tracker.transition_to(BattlePhase.SKILL_ANIMATION)
-            time.sleep(2.5)
+            self._wait_for_skill_to_resolve(2.5)
         
         return False
     
     def attempt_capture(self, rarity: str, max_attempts: int) -> bool:
         """Execute capture sequence"""
-        rarity_cfg = self.cfg.get("eligibility", {}).get("per_rarity", {}).get(rarity, {})
-        capture_skill_str = rarity_cfg.get("capture_skill", "Skill 12")
-        
-        try:
-            capture_skill = int(capture_skill_str.split()[-1])
-        except:
-            capture_skill = 12
+        capture_skill = self._skills_for(rarity)["capture_skill"]
         
         self.log.info(f"🎯 Capture attempts: {max_attempts}")
         
         for attempt in range(1, max_attempts + 1):
+            if not self._spend_turn():
+                self.log.warning("Turn budget used up before capture")
+                self.stats["captures_attempted"] += attempt - 1
+                return False
+            
             self.log.info(f"📦 Attempt {attempt}/{max_attempts}")
             
             self.wait_for_turn(5.0)
             
-            if self.cfg.get("battle", {}).get("use_capture_skill_before", False):
+            if self._battle_cfg.use_capture_skill_before and self._spend_turn():
                 self.skill_mgr.use_skill(capture_skill)
                 time.sleep(2.0)
                 self.wait_for_turn(5.0)
@@ -600,8 +993,7 @@ class Battle:
                 self.phase_tracker.transition_to(BattlePhase.CAPTURE_SUCCESS)
                 
                 time.sleep(1.0)
-                keep_roi = self.rois["keep_button"]
-                self.io.click_xy(keep_roi["x"], keep_roi["y"])
+                self.io.click_xy(*self._keep_xy)
                 self.stats["captures_successful"] += 1
                 
                 time.sleep(2.0)
@@ -614,12 +1006,7 @@ class Battle:
     
     def defeat_quickly(self):
         """Defeat Miscrit using strongest skills"""
-        defeat_skill_str = self.cfg.get("battle", {}).get("defeat_skill", "Skill 1")
-        
-        try:
-            defeat_skill = int(defeat_skill_str.split()[-1])
-        except:
-            defeat_skill = 1
+        defeat_skill = self._battle_cfg.defeat_skill
         
         self.log.info(f"⚔️ Quick defeat with Skill {defeat_skill}")
         
@@ -630,9 +1017,13 @@ class Battle:
                 self.log.info("✓ Miscrit defeated!")
                 break
             
-            self.wait_for_turn(5.0)
+            # The phase was just read; only poll again when it isn't our turn yet
+            if phase == BattlePhase.TURN_READY:
+                self.phase_tracker.transition_to(BattlePhase.TURN_READY)
+            else:
+                self.wait_for_turn(5.0)
             self.skill_mgr.use_skill(defeat_skill)
-            time.sleep(2.0)
+            self._wait_for_skill_to_resolve(2.0)
         
         self.stats["defeated"] += 1
     
@@ -640,73 +1031,82 @@ class Battle:
         """Click Continue button after battle"""
         time.sleep(1.5)
         
-        # Wait for battle end screen
+        # Wait for battle end screen: poll fast at first, back off to 1s
         max_wait = 5
+        interval = 0.2
         start = time.time()
         while time.time() - start < max_wait:
             phase = self.detector.detect_battle_phase()
             if phase == BattlePhase.BATTLE_WON:
                 self.log.info("✓ Battle ended!")
                 break
-            time.sleep(0.5)
+            time.sleep(interval)
+            interval = min(1.0, interval * 1.3)
         
-        roi = self.rois["continue_button"]
-        self.io.click_xy(roi["x"], roi["y"])
+        self.io.click_xy(*self._continue_xy)
         self.log.info("✓ Clicked Continue")
         time.sleep(1.5)
     
+    def _step_identify(self) -> EncounterStep:
+        """Wait for the first turn, read the Miscrit and pick capture or defeat"""
+        self.skill_mgr.reset_to_page_1()
+        
+        # Wait for first turn (this also covers the battle intro)
+        if not self.wait_for_turn(10.0):
+            self.log.warning("Turn timeout")
+        
+        # Detect Miscrit info
+        capture_rate, ip_rating, rarity = self.capture_detector.get_miscrit_info()
+        
+        if not rarity or not ip_rating:
+            self.log.warning("Could not detect Miscrit info")
+            return EncounterStep.DEFEAT
+        
+        self.log.info(f"{_RULE}\n🎮 {rarity} {ip_rating} (Rate: {capture_rate}%)\n{_RULE}")
+        
+        # Check eligibility
+        if not self.is_eligible(rarity, ip_rating):
+            self.log.info("⏭️ Not eligible - defeating")
+            self.stats["skipped"] += 1
+            return EncounterStep.DEFEAT
+        
+        self.log.info(self._plan_strings.get(rarity, "🎯 TARGET DETECTED - Capture mode"))
+        self._target_rarity = rarity
+        return EncounterStep.CHIP
+    
+    def _step_chip(self) -> EncounterStep:
+        if not self.chip_hp_to_threshold(self._target_rarity, self._battle_cfg.capture_hp_percent):
+            self.log.warning("Failed to reduce HP")
+        return EncounterStep.CAPTURE
+    
+    def _step_capture(self) -> EncounterStep:
+        if self.attempt_capture(self._target_rarity, self._battle_cfg.attempts):
+            return EncounterStep.FINISH
+        self.log.warning("Capture failed - defeating")
+        return EncounterStep.DEFEAT
+    
+    def _step_defeat(self) -> EncounterStep:
+        self.defeat_quickly()
+        return EncounterStep.FINISH
+    
+    def _step_finish(self) -> EncounterStep:
+        # Wait for battle end and click continue
+        self.click_continue()
+        self.phase_tracker.transition_to(BattlePhase.BATTLE_END)
+        return EncounterStep.DONE
+    
     def handle_encounter(self) -> bool:
-        """Main battle handler"""
+        """Main battle handler: run the encounter steps until DONE"""
         try:
             self.stats["total_battles"] += 1
             self.phase_tracker.reset()
             self.phase_tracker.transition_to(BattlePhase.BATTLE_START)
+            self._turns_left = self._battle_cfg.max_turns_per_battle
+            self._target_rarity = None
             
-            time.sleep(2.0)
-            self.skill_mgr.reset_to_page_1()
-            
-            # Wait for first turn
-            if not self.wait_for_turn(10.0):
-                self.log.warning("Turn timeout")
-            
-            # Detect Miscrit info
-            capture_rate, ip_rating, rarity = self.capture_detector.get_miscrit_info()
-            
-            if not rarity or not ip_rating:
-                self.log.warning("Could not detect Miscrit info")
-                self.defeat_quickly()
-                self.click_continue()
-                return True
-            
-            self.log.info("═" * 50)
-            self.log.info(f"🎮 {rarity} {ip_rating} (Rate: {capture_rate}%)")
-            self.log.info("═" * 50)
-            
-            # Check eligibility
-            if not self.is_eligible(rarity, ip_rating):
-                self.log.info("⏭️ Not eligible - defeating")
-                self.stats["skipped"] += 1
-                self.defeat_quickly()
-            else:
-                # Capture sequence
-                self.log.info("🎯 TARGET DETECTED - Capture mode")
-                
-                hp_threshold = self.cfg.get("battle", {}).get("capture_hp_percent", 10)
-                max_attempts = self.cfg.get("battle", {}).get("attempts", 3)
-                
-                # Chip HP
-                if not self.chip_hp_to_threshold(rarity, float(hp_threshold)):
-                    self.log.warning("Failed to reduce HP")
-                
-                # Attempt capture
-                if not self.attempt_capture(rarity, max_attempts):
-                    self.log.warning("Capture failed - defeating")
-                    self.defeat_quickly()
-            
-            # Wait for battle end and click continue
-            self.click_continue()
-            
-            self.phase_tracker.transition_to(BattlePhase.BATTLE_END)
+            step = EncounterStep.IDENTIFY
+            while step is not EncounterStep.DONE:
+                step = self._step_handlers[step]()
             return True
             
         except Exception as e:
@@ -738,6 +1138,8 @@ class Battle:
 class BattleManager:
     """Manages battle detection and handling with cooldown tracking"""
     
+    __slots__ = ("battle", "in_battle", "battle_count", "log", "last_battle_end", "cooldown_duration")
+    
     def __init__(self, cfg, vision, input_ctl, log, base_dir):
         self.battle = Battle(cfg, vision, input_ctl, log, base_dir)
         self.in_battle = False
@@ -760,10 +1162,7 @@ class BattleManager:
             self.in_battle = True
             self.battle_count += 1
             
-            self.log.info("")
-            self.log.info("╔" + "═" * 50 + "╗")
-            self.log.info(f"║  BATTLE #{self.battle_count}" + " " * 39 + "║")
-            self.log.info("╚" + "═" * 50 + "╝")
+            self.log.info(f"\n{_BOX_TOP}\n║  BATTLE #{self.battle_count}{' ' * 39}║\n{_BOX_BOTTOM}")
             
             result = self.battle.handle_encounter()
             
@@ -772,16 +1171,27 @@ class BattleManager:
             
             # Show stats
             stats = self.battle.get_stats()
-            self.log.info("📊 Session Stats:")
-            self.log.info(f"   Battles: {stats['total_battles']}")
-            self.log.info(f"   Captures: {stats['captures_successful']}")
-            self.log.info(f"   Skipped: {stats['skipped']}")
-            self.log.info(f"   Defeated: {stats['defeated']}")
+            self.log.info(
+                "📊 Session Stats:\n"
+                f"   Battles: {stats['total_battles']}\n"
+                f"   Captures: {stats['captures_successful']}\n"
+                f"   Skipped: {stats['skipped']}\n"
+                f"   Defeated: {stats['defeated']}"
+            )
             
             return result
         
         return False
     
+    def wait_for_battle_start(self, timeout: float = 2.0, interval: float = 0.1) -> bool:
+        """Poll the phase gates until a battle shows up (True) or timeout (False)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.battle.detector.detect_battle_phase(max_age=0) != BattlePhase.NOT_IN_BATTLE:
+                return True
+            time.sleep(interval)
+        return False
+    
     def get_cooldown_remaining(self) -> float:
         """Get remaining cooldown time"""
         if self.last_battle_end == 0:
@@ -1,8 +1,13 @@
 # src/capture_loop.py - Fixed with proper spot detection and battle handling
-import os, json, time
+import os, time, hashlib
+from collections import OrderedDict
 import cv2
 import numpy as np
-from mss import mss
+
+try:
+    import orjson as _json_lib
+except ImportError:
+    import json as _json_lib
 
 from .vision import Vision
 from .input_ctl import InputCtl
@@ -24,8 +29,8 @@ def _rect_to_xywh(rect):
 class Bot:
     def __init__(self, cfg_path: str, base_dir: str):
         self.base_dir = base_dir
-        with open(cfg_path, "r", encoding="utf-8") as f:
-            self.cfg = json.load(f)
+        with open(cfg_path, "rb") as f:
+            self.cfg = _json_lib.loads(f.read())
 
         self.log = setup_logger(
             "bot",
@@ -66,9 +71,18 @@ class Bot:
         self.tpl_path = ""
         self.tpl_bgr = None
         self.tpl_small = None
+        self.tpl_levels = 1
         self.tpl_w = 0
         self.tpl_h = 0
         self.threshold = 0.82
+        self.search_roi = None  # (x, y, w, h) in client coords, None = whole window
+        self._coarse_res = None  # reused matchTemplate output for the coarse pass
+
+        # Recent spot-match results keyed by a 16x16 thumbnail hash, so a
+        # static screen isn't re-matched every tick (LRU, short TTL)
+        self._match_cache = OrderedDict()
+        self._match_cache_cap = 16
+        self._match_cache_ttl = 5.0
 
         # Battle management
         self.battle_enabled = bool(self.cfg.get("battle", {}).get("enabled", False))
@@ -79,16 +93,22 @@ class Bot:
         if not self.cfg.get("traits", {}).get("cooldown_reduction", False):
             self.cooldown_duration = 34.0
         
-        if self.battle_enabled:
-            from .battle import BattleManager
-            self.battle_manager = BattleManager(self.cfg, self.vision, self.io, self.log, self.base_dir)
-            self.log.info("⚔️ Battle system enabled")
-            self.log.info(f"⏱️ Cooldown: {self.cooldown_duration}s after battles")
-        else:
-            self.log.info("⚠️ Battle system disabled")
-
-        self._load_selected_spot()
-        self._bind_window()
+        # Vision may own a capture thread; stop it if start-up fails below
+        # (no spot, game window not open, ...) so UI retries don't stack them
+        try:
+            if self.battle_enabled:
+                from .battle import BattleManager
+                self.battle_manager = BattleManager(self.cfg, self.vision, self.io, self.log, self.base_dir)
+                self.log.info("⚔️ Battle system enabled")
+                self.log.info(f"⏱️ Cooldown: {self.cooldown_duration}s after battles")
+            else:
+                self.log.info("⚠️ Battle system disabled")
+
+            self._load_selected_spot()
+            self._bind_window()
+        except Exception:
+            self.vision.close()
+            raise
 
     def _load_selected_spot(self):
         """Load selected spot from config"""
@@ -96,8 +116,8 @@ class Bot:
         if not os.path.exists(spots_path):
             raise RuntimeError(f"{SPOTS_FILE} not found. Run --init first.")
 
-        with open(spots_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(spots_path, "rb") as f:
+            data = _json_lib.loads(f.read())
 
         spots = data.get("spots", [])
         idx = int(self.cfg.get("run", {}).get("selected_spot_index", 0))
@@ -111,6 +131,14 @@ class Bot:
 
         self.log.info(f"Selected: '{name}' (threshold={self.threshold:.2f})")
 
+        # Optional search region; [0,0,0,0] (the default) means the whole window
+        roi = self.selected_spot.get("roi") or [0, 0, 0, 0]
+        try:
+            rx, ry, rw, rh = (int(v) for v in roi)
+        except (TypeError, ValueError):
+            rx = ry = rw = rh = 0
+        self.search_roi = (rx, ry, rw, rh) if rw > 0 and rh > 0 else None
+
         if not tpl_rel:
             raise RuntimeError(f"Spot '{name}' has no template.")
 
@@ -123,9 +151,16 @@ class Bot:
             raise RuntimeError(f"Failed to read template: {self.tpl_path}")
 
         self.tpl_h, self.tpl_w = self.tpl_bgr.shape[:2]
-        self.tpl_small = cv2.resize(self.tpl_bgr, (0, 0), fx=0.5, fy=0.5)
+
+        # Coarse pyramid level: 1/4 scale when the template stays big enough
+        self.tpl_levels = 2 if min(self.tpl_w, self.tpl_h) >= 40 else 1
+        self.tpl_small = self.tpl_bgr
+        for _ in range(self.tpl_levels):
+            self.tpl_small = cv2.pyrDown(self.tpl_small)
         
         self.log.info(f"Template: {self.tpl_w}x{self.tpl_h}")
+        if self.search_roi:
+            self.log.info(f"Search ROI: {self.search_roi}")
 
     def _bind_window(self):
         """Find and bind to Miscrits window"""
@@ -156,6 +191,79 @@ class Bot:
                 self.log.warning(f"Overlay failed: {e}")
                 self.overlay = None
 
+    def _search_region(self, W, H):
+        """
+        Client-area rectangle (x, y, w, h) to capture and search.
+        The spot ROI is clamped to the window and grown to fit the template.
+        """
+        if not self.search_roi:
+            return 0, 0, W, H
+        rx, ry, rw, rh = self.search_roi
+        rw = max(rw, self.tpl_w)
+        rh = max(rh, self.tpl_h)
+        rx = min(max(0, rx), max(0, W - rw))
+        ry = min(max(0, ry), max(0, H - rh))
+        return rx, ry, min(rw, W - rx), min(rh, H - ry)
+
+    def _match_spot(self, frame_bgr):
+        """
+        Coarse-to-fine template search.
+        Returns (score, x, y) of the best match in frame coordinates.
+        """
+        small = frame_bgr
+        for _ in range(self.tpl_levels):
+            small = cv2.pyrDown(small)
+
+        # Frame size is fixed for a run, so the coarse result buffer is allocated once
+        res_shape = (small.shape[0] - self.tpl_small.shape[0] + 1,
+                     small.shape[1] - self.tpl_small.shape[1] + 1)
+        if self._coarse_res is None or self._coarse_res.shape != res_shape:
+            self._coarse_res = np.empty(res_shape, dtype=np.float32)
+
+        res = cv2.matchTemplate(small, self.tpl_small, cv2.TM_CCOEFF_NORMED, self._coarse_res)
+        _, coarse_v, _, coarse_loc = cv2.minMaxLoc(res)
+
+        scale = 1 << self.tpl_levels
+        x = coarse_loc[0] * scale
+        y = coarse_loc[1] * scale
+
+        # Most frames have no spot: reject on the cheap coarse score
+        if coarse_v < self.threshold - 0.2:
+            return coarse_v, x, y
+
+        # Refine at full resolution in a small window around the coarse peak
+        pad = 2 * scale
+        fh, fw = frame_bgr.shape[:2]
+        x0 = max(0, x - pad)
+        y0 = max(0, y - pad)
+        x1 = min(fw, x + self.tpl_w + pad)
+        y1 = min(fh, y + self.tpl_h + pad)
+        window = frame_bgr[y0:y1, x0:x1]
+        if window.shape[0] < self.tpl_h or window.shape[1] < self.tpl_w:
+            return coarse_v, x, y
+
+        res = cv2.matchTemplate(window, self.tpl_bgr, cv2.TM_CCOEFF_NORMED)
+        _, maxv, _, maxloc = cv2.minMaxLoc(res)
+        return maxv, x0 + maxloc[0], y0 + maxloc[1]
+
+    def _match_spot_cached(self, frame_bgr):
+        """_match_spot with an LRU cache keyed by a downsampled frame hash"""
+        thumb = cv2.resize(frame_bgr, (16, 16), interpolation=cv2.INTER_AREA)
+        key = hashlib.blake2b(thumb.tobytes(), digest_size=8).digest()
+        now = time.time()
+
+        hit = self._match_cache.get(key)
+        if hit is not None and now - hit[0] < self._match_cache_ttl:
+            self._match_cache.move_to_end(key)
+            return hit[1]
+
+        result = self._match_spot(frame_bgr)
+        self._match_cache[key] = (now, result)
+        self._match_cache.move_to_end(key)
+        if len(self._match_cache) > self._match_cache_cap:
+            self._match_cache.popitem(last=False)
+        return result
+
     def start(self):
         """Start the bot main loop"""
         self.running = True
@@ -181,12 +289,17 @@ class Bot:
     def _loop(self):
         """Main bot loop with improved battle and cooldown handling"""
         L, T, W, H = self.window_xywh
+        # Only the spot's ROI is grabbed and searched; match coords are offset back
+        rx, ry, rw, rh = self._search_region(W, H)
         
         consecutive_errors = 0
         max_errors = 5
         
         last_battle_check = 0
-        battle_check_interval = 0.5  # Check more frequently
+        # Battle checks back off (0.5s -> 2s) while nothing shows up,
+        # and snap back to fast after a click or a handled battle
+        battle_check_min, battle_check_max = 0.5, 2.0
+        battle_check_interval = battle_check_min
         
         cooldown_end_time = 0
         last_cooldown_log = 0
@@ -234,8 +347,11 @@ class Bot:
                 if self.battle_enabled and current_time - last_battle_check >= battle_check_interval:
                     last_battle_check = current_time
                     
-                    if self.battle_manager.check_and_handle_battle():
+                    if not self.battle_manager.check_and_handle_battle():
+                        battle_check_interval = min(battle_check_interval * 2, battle_check_max)
+                    else:
                         # Battle was handled
+                        battle_check_interval = battle_check_min
                         battle_stats = self.battle_manager.get_statistics()
                         self.stats["encounters"] = battle_stats.get("total_battles", 0)
                         self.stats["captures"] = battle_stats.get("captures_successful", 0)
@@ -255,10 +371,8 @@ class Bot:
 
                 # Capture screen
                 try:
-                    with mss() as sct:
-                        frame_bgr = np.array(
-                            sct.grab({"left": L, "top": T, "width": W, "height": H})
-                        )[:, :, :3]
+                    # Shared grabber: one MSS handle per thread (or the DXcam frame)
+                    frame_bgr = self.vision.screen_grab_region(L + rx, T + ry, rw, rh)
                 except Exception as e:
                     self.log.error(f"Screen capture failed: {e}")
                     consecutive_errors += 1
@@ -270,14 +384,10 @@ class Bot:
 
                 consecutive_errors = 0
 
-                # Template matching (multi-scale)
-                frame_small = cv2.resize(frame_bgr, (0, 0), fx=0.5, fy=0.5)
-                res = cv2.matchTemplate(frame_small, self.tpl_small, cv2.TM_CCOEFF_NORMED)
-                _, maxv, _, maxloc = cv2.minMaxLoc(res)
-
-                # Scale coordinates back
-                x = int(maxloc[0] * 2)
-                y = int(maxloc[1] * 2)
+                # Template matching (coarse-to-fine pyramid)
+                maxv, x, y = self._match_spot_cached(frame_bgr)
+                x += rx
+                y += ry
                 found = maxv >= self.threshold
 
                 if found:
@@ -305,10 +415,12 @@ class Bot:
                             except:
                                 pass
                         
-                        # Wait for battle to start
+                        # Wait for battle to start; hand off as soon as it shows
                         if self.battle_enabled:
                             self.log.info("⏳ Waiting for battle...")
-                            time.sleep(2.0)
+                            battle_check_interval = battle_check_min
+                            if self.battle_manager.wait_for_battle_start(2.0):
+                                last_battle_check = 0
                         
                     except Exception as e:
                         self.log.error(f"Click failed: {e}")
@@ -355,6 +467,8 @@ class Bot:
             except:
                 pass
 
+        self.vision.close()
+
         self.log.info("=" * 60)
         self.log.info("📊 Final Statistics:")
         self.log.info(f"   Spot clicks: {self.stats['clicks']}")
@@ -1,7 +1,8 @@
 # src/input_ctl.py
 import time, random
 import ctypes
-from ctypes import windll, c_long, c_ulong, c_int, byref, POINTER, Structure
+from ctypes import windll, c_long, c_ulong, c_int, byref, POINTER, Structure, Union, sizeof
+from ctypes import wintypes
 import win32api
 import win32con
 import win32gui
@@ -40,8 +41,48 @@ VK_CODES = {
     'shift': win32con.VK_SHIFT,
     'ctrl': win32con.VK_CONTROL,
     'alt': win32con.VK_MENU,
+    'left': win32con.VK_LEFT,
+    'right': win32con.VK_RIGHT,
+    'up': win32con.VK_UP,
+    'down': win32con.VK_DOWN,
 }
 
+# Keys that need KEYEVENTF_EXTENDEDKEY when sent by scancode
+EXTENDED_KEYS = {win32con.VK_LEFT, win32con.VK_RIGHT, win32con.VK_UP, win32con.VK_DOWN}
+
+
+# ========== SendInput structures ==========
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_SCANCODE = 0x0008
+ULONG_PTR = ctypes.c_size_t
+
+
+class MOUSEINPUT(Structure):
+    _fields_ = [("dx", c_long), ("dy", c_long), ("mouseData", wintypes.DWORD),
+                ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD),
+                ("dwExtraInfo", ULONG_PTR)]
+
+
+class KEYBDINPUT(Structure):
+    _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD),
+                ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD),
+                ("dwExtraInfo", ULONG_PTR)]
+
+
+class _INPUTUNION(Union):
+    # MOUSEINPUT is the largest member; it sets sizeof(INPUT)
+    _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT)]
+
+
+class INPUT(Structure):
+    _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+
+KeyPair = INPUT * 2
+
 
 def get_vk_code(key: str) -> int:
     """Get virtual key code for a key string"""
@@ -66,6 +107,10 @@ class InputCtl:
         self.move_duration_range = cfg.get("input", {}).get("move_duration_range", [0.04, 0.11])
         self.click_delay_range = cfg.get("input", {}).get("click_delay_ms_range", [80, 180])
         self.move_delay_range = cfg.get("input", {}).get("move_delay_ms_range", [60, 140])
+        self.fast_move = cfg.get("input", {}).get("fast_move", True)
+        # fast_keys: scancode SendInput (down, hold, up) instead of pyautogui/pydirectinput.press
+        self.fast_keys = cfg.get("input", {}).get("fast_keys", True)
+        self._user32 = windll.user32
         
         if HAS_PYAUTOGUI:
             pyautogui.PAUSE = 0
@@ -99,6 +144,18 @@ class InputCtl:
         """Random delay from range"""
         return _jitter(delay_range[0], delay_range[1])
 
+    def _move_pyautogui(self, x: int, y: int):
+        """
+        Move the cursor for the PyAutoGUI backend.
+        fast_move: one SetCursorPos + sleep instead of pyautogui's tween loop
+        """
+        duration = self._random_delay(self.move_duration_range)
+        if self.fast_move:
+            windll.user32.SetCursorPos(int(x), int(y))
+            time.sleep(duration)
+        else:
+            pyautogui.moveTo(x, y, duration=duration)
+
     # ========== CLICKING METHODS ==========
 
     def click_xy(self, x: int, y: int):
@@ -163,7 +220,7 @@ class InputCtl:
         if not HAS_PYAUTOGUI:
             raise RuntimeError("PyAutoGUI not available")
         
-        pyautogui.moveTo(x, y, duration=self._random_delay(self.move_duration_range))
+        self._move_pyautogui(x, y)
         self._sleep_ms(self._random_delay(self.move_delay_range))
         pyautogui.click()
         self._sleep_ms(self._random_delay(self.click_delay_range))
@@ -176,6 +233,9 @@ class InputCtl:
             if not self.hwnd:
                 raise RuntimeError("DirectInput requires window handle")
             self._key_directinput(key)
+        elif self.fast_keys and get_vk_code(key):
+            self._key_sendinput(key)
+            self._sleep_ms(self._random_delay(self.click_delay_range))
         elif self.backend == "pydirectinput" and HAS_PDI:
             pydirectinput.press(key)
             self._sleep_ms(self._random_delay(self.click_delay_range))
@@ -185,6 +245,30 @@ class InputCtl:
         else:
             raise RuntimeError("No keyboard backend available")
 
+    def _key_sendinput(self, key: str):
+        """
+        Key down, short hold, key up via SendInput (requires focus).
+        Sent by scancode so DirectInput-based games see it too; the hold
+        matches _key_directinput so games that poll key state each frame
+        don't miss the press.
+        """
+        vk_code = get_vk_code(key)
+        scan_code = win32api.MapVirtualKey(vk_code, 0)
+        flags = KEYEVENTF_SCANCODE
+        if vk_code in EXTENDED_KEYS:
+            flags |= KEYEVENTF_EXTENDEDKEY
+
+        events = KeyPair()
+        events[0].type = events[1].type = INPUT_KEYBOARD
+        events[0].u.ki = KEYBDINPUT(0, scan_code, flags, 0, 0)
+        events[1].u.ki = KEYBDINPUT(0, scan_code, flags | KEYEVENTF_KEYUP, 0, 0)
+
+        if self._user32.SendInput(1, byref(events[0]), sizeof(INPUT)) != 1:
+            raise RuntimeError(f"SendInput key down failed: {key}")
+        self._sleep_ms(self._random_delay([40, 90]))
+        if self._user32.SendInput(1, byref(events[1]), sizeof(INPUT)) != 1:
+            raise RuntimeError(f"SendInput key up failed: {key}")
+
     def _key_directinput(self, key: str):
         """
         Send key press using Windows messages (non-intrusive).
@@ -259,8 +343,7 @@ class InputCtl:
             pydirectinput.moveTo(x, y, duration=duration)
             self._sleep_ms(self._random_delay(self.move_delay_range))
         elif HAS_PYAUTOGUI:
-            duration = self._random_delay(self.move_duration_range)
-            pyautogui.moveTo(x, y, duration=duration)
+            self._move_pyautogui(x, y)
             self._sleep_ms(self._random_delay(self.move_delay_range))
 
     def click(self):
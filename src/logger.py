@@ -1,16 +1,25 @@
 
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_FMT = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
 
 def setup_logger(name: str, filename: str, level: str = "INFO"):
     logger = logging.getLogger(name)
     if logger.handlers:
         return logger
     logger.setLevel(getattr(logging, level.upper(), logging.INFO))
-    fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
+    logger.propagate = False
     ch = logging.StreamHandler()
-    ch.setFormatter(fmt)
+    ch.setFormatter(_FMT)
     fh = logging.FileHandler(filename, encoding="utf-8")
-    fh.setFormatter(fmt)
-    logger.addHandler(ch)
-    logger.addHandler(fh)
+    fh.setFormatter(_FMT)
+    # Console/file writes happen on the listener thread, not the bot loop
+    q = queue.Queue(-1)
+    logger.addHandler(QueueHandler(q))
+    listener = QueueListener(q, ch, fh)
+    listener.start()
+    atexit.register(listener.stop)
     return logger
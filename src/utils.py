@@ -2,19 +2,22 @@
 
 # Grade ranking (old system, still supported)
 RANK_ORDER = ["C","C+","B","B+","A","A+","S","S+"]
+_RANK_IDX = {r: i for i, r in enumerate(RANK_ORDER)}
 
 # IP Rating ranking (new system) - from strongest to weakest
 IP_RATINGS_ORDER = ["S+", "S", "A+", "A", "B+", "B", "C+", "C", "D+", "D", "F+", "F", "F-"]
+IP_RATING_INDEX = {r: i for i, r in enumerate(IP_RATINGS_ORDER)}
+B_PLUS_AND_BELOW = frozenset(IP_RATINGS_ORDER[IP_RATING_INDEX["B+"]:])
 
 # Rarity list
 RARITIES = ["Common","Rare","Epic","Exotic","Legendary"]
 
 
 def rank_index(r):
-    """Get index of grade rank (old system)"""
+    """Get index of grade rank (old system), -1 if unknown"""
     try:
-        return RANK_ORDER.index(r)
-    except Exception:
+        return _RANK_IDX.get(r, -1)
+    except TypeError:  # unhashable input
         return -1
 
 
@@ -24,15 +27,13 @@ def rank_ge(found, minimum):
         return True
     if not found:
         return False
+    # Unknown grades rank -1 on both sides, as before the dict lookup
     return rank_index(found) >= rank_index(minimum)
 
 
 def ip_rating_index(rating: str) -> int:
     """Get index of IP rating (lower index = stronger)"""
-    try:
-        return IP_RATINGS_ORDER.index(rating)
-    except (ValueError, AttributeError):
-        return 999  # Unknown rating is weakest
+    return IP_RATING_INDEX.get(rating, 999)  # Unknown rating is weakest
 
 
 def ip_rating_meets_minimum(found: str, minimum: str) -> bool:
@@ -57,11 +58,11 @@ def ip_rating_meets_minimum(found: str, minimum: str) -> bool:
     
     # Special case: "B+ and Below" accepts anything B+ or lower
     if minimum == "B+ and Below":
-        return found in ["B+", "B", "C+", "C", "D+", "D", "F+", "F"]
+        return found in B_PLUS_AND_BELOW
     
     # Normal comparison: lower index = stronger
-    found_idx = ip_rating_index(found)
-    min_idx = ip_rating_index(minimum)
+    found_idx = IP_RATING_INDEX.get(found, 999)
+    min_idx = IP_RATING_INDEX.get(minimum, 999)
     
     # found must be same or stronger (same or lower index)
     return found_idx <= min_idx
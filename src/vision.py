@@ -1,10 +1,16 @@
 
 from typing import Optional, Tuple, Dict
-import time, json, os
+import time, json, os, threading
 import numpy as np
 import cv2
 from mss import mss
 
+try:
+    import dxcam
+    HAS_DXCAM = True
+except ImportError:
+    HAS_DXCAM = False
+
 RANK_ORDER = ["All","C","C+","B","B+","A","A+","S","S+"]
 
 class Screen:
@@ -21,32 +27,113 @@ class Screen:
             x,y,w,h = region
             monitor = {"left": x, "top": y, "width": w, "height": h}
             grab = self.sct.grab(monitor)
-        img = np.array(grab)
-        if img.shape[2] == 4:
-            img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-        return img
+        # zero-copy view of the BGRA buffer; cvtColor is the only copy
+        img = np.frombuffer(grab.raw, dtype=np.uint8).reshape(grab.height, grab.width, 4)
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
 
 def filled_ratio(img_bgr):
     # simple horizontal bar: compute fraction of non-background pixels
     gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
     _, th = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY+cv2.THRESH_OTSU)
     # assume bar is darker than background OR vice versa; fallback to edge density
-    colsum = th.sum(axis=0) / 255.0
-    return float((colsum > (0.5*img_bgr.shape[0])).mean())
+    # one SIMD column reduction instead of NumPy sum/divide/compare temporaries
+    col_counts = cv2.reduce(th, 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel() // 255
+    return float(np.count_nonzero(col_counts > (0.5*th.shape[0]))) / th.shape[1]
+
+class MssBackend:
+    """GDI capture through MSS; one handle per thread (MSS DCs are thread-bound)"""
+    name = "mss"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss()
+        return sct
+
+    def grab(self, x, y, w, h, grayscale=False):
+        monitor = {"left": int(x), "top": int(y), "width": int(w), "height": int(h)}
+        img = self._sct().grab(monitor)
+        # MSS returns BGRA; drop alpha (or go straight to gray) in a single cv2 pass
+        code = cv2.COLOR_BGRA2GRAY if grayscale else cv2.COLOR_BGRA2BGR
+        return cv2.cvtColor(np.asarray(img), code)
+
+    def close(self):
+        pass
+
+
+class DxcamBackend:
+    """
+    DXGI Desktop Duplication through DXcam (Windows), grabbed on demand.
+    Only the requested region is copied out of the duplicated surface; no
+    capture thread runs between grabs.
+    """
+    name = "dxcam"
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        # grab() never touches the frame ring buffer; keep it tiny instead
+        # of the 64 full-screen frames DXcam allocates by default
+        self._cam = dxcam.create(output_color="BGR", max_buffer_len=2)
+        self._out_w, self._out_h = self._cam.width, self._cam.height
+
+    def grab(self, x, y, w, h, grayscale=False):
+        x, y, w, h = int(x), int(y), int(w), int(h)
+        frame = None
+        # Only the primary output is duplicated: anything not fully inside
+        # it (negative coords, secondary monitor) goes through MSS
+        if w > 0 and h > 0 and x >= 0 and y >= 0 and x + w <= self._out_w and y + h <= self._out_h:
+            # None when the screen hasn't changed since the last grab
+            frame = self._cam.grab(region=(x, y, x + w, y + h))
+        if frame is None:
+            return self._fallback.grab(x, y, w, h, grayscale)
+        if grayscale:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame
+
+    def close(self):
+        try:
+            self._cam.release()
+        except Exception:
+            pass
+        self._fallback.close()
+
+
+def create_backend(cfg):
+    """Pick the capture backend from cfg["screen"]["backend"] ("mss" default, or opt-in "dxcam")"""
+    backend = cfg.get("screen", {}).get("backend", "mss")
+    fallback = MssBackend()
+    if backend == "dxcam" and HAS_DXCAM:
+        try:
+            return DxcamBackend(fallback)
+        except Exception:
+            pass  # no DXGI output (RDP, old driver, ...): stay on MSS
+    return fallback
+
 
 class Vision:
     def __init__(self, cfg):
         self.cfg = cfg
+        # MSS unless the config opts in to DXGI Desktop Duplication
+        self.backend = create_backend(cfg)
 
-    def screen_grab_region(self, x, y, w, h):
+    def screen_grab_region(self, x, y, w, h, grayscale=False):
         """
-        Capture live region each time (no cached frame).
-        Returns an RGB numpy array.
+        Capture a screen region through the configured backend.
+        Every call is a fresh grab of just that region: DXcam duplicates it
+        on demand; MSS (per-thread handle) covers the rest, including
+        regions outside the duplicated output and unchanged screens.
+        Returns a BGR numpy array (same channel order as cv2/templates),
+        or a single-channel image converted straight from the grab buffer
+        when grayscale=True.
         """
-        with mss.mss() as sct:  # new context each call = live
-            monitor = {"left": int(x), "top": int(y), "width": int(w), "height": int(h)}
-            img = sct.grab(monitor)
-            # MSS returns BGRA; convert to RGB
-            frame = np.array(img)
-            rgb = frame[:, :, :3][:, :, ::-1]  # BGRA→RGB
-            return rgb
\ No newline at end of file
+        return self.backend.grab(x, y, w, h, grayscale)
+
+    def close(self):
+        """Release the capture backend (DXcam device, MSS handles)"""
+        self.backend.close()
+        # Later grabs still work, through plain MSS
+        if not isinstance(self.backend, MssBackend):
+            self.backend = MssBackend()
\ No newline at end of file
@@ -27,13 +27,28 @@ def rect_to_xywh(rect):
     return (L, T, R - L, B - T)
 
 # ---- Window discovery ----
+# needle -> HWND of the last match; revalidated before every reuse
+_WINDOW_CACHE: dict[str, int] = {}
+
 def find_window_by_title_substring(needle: str):
     """
     Match ONLY a window whose title is exactly equal to `needle`
     (case-insensitive). If multiple exist, pick the one with the largest
-    client area.
+    client area. The last match is cached and only re-enumerated once it
+    is gone, hidden or retitled.
     """
     needle = needle.strip().lower()
+
+    hwnd = _WINDOW_CACHE.get(needle)
+    if hwnd and is_window_valid(hwnd):
+        try:
+            title = win32gui.GetWindowText(hwnd)
+            if title.strip().lower() == needle:
+                return hwnd, get_client_rect_on_screen(hwnd), title
+        except Exception:
+            pass
+    _WINDOW_CACHE.pop(needle, None)
+
     best = {"hwnd": None, "rect": None, "title": None, "area": 0}
 
     def enum_cb(hwnd, _):
@@ -56,6 +71,8 @@ def find_window_by_title_substring(needle: str):
             pass
 
     win32gui.EnumWindows(enum_cb, None)
+    if best["hwnd"]:
+        _WINDOW_CACHE[needle] = best["hwnd"]
     return best["hwnd"], best["rect"], best["title"]
 
 # ---- Foreground focusing (robust) ----